@@ -4,17 +4,32 @@
 
 import os
 import time
+import queue
+import hashlib
+import threading
 import random
 import logging
 import re
+import string
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import cache, lru_cache
+from urllib.parse import quote
 
+import orjson
 from dotenv import load_dotenv
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, request, render_template, send_file
 from flask_cors import CORS
+from requests.adapters import HTTPAdapter
+from twilio.http.http_client import TwilioHttpClient
 from twilio.rest import Client
+from twilio.twiml.voice_response import VoiceResponse
 from yt_dlp import YoutubeDL
 
+from utils.emergency_alert import is_emergency
+
 # ======================= BASIC SETUP =======================
 load_dotenv(override=True)
 logging.basicConfig(level=logging.INFO, format="%(message)s")
@@ -22,13 +37,17 @@ logging.basicConfig(level=logging.INFO, format="%(message)s")
 app = Flask(__name__)
 CORS(app)
 
+def ojson(obj, status=200):
+    # orjson already returns bytes, so the body goes out without re-encoding
+    return app.response_class(orjson.dumps(obj), status=status, mimetype="application/json")
+
 os.makedirs("static", exist_ok=True)
-OUTPUT_AUDIO = "static/output.wav"
 
 IS_RENDER = os.getenv("RENDER") == "true"
 
 # ======================= CONFIG =======================
 ALERT_COOLDOWN = 15
+TTS_TIMEOUT = 10
 
 TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
@@ -47,29 +66,88 @@ TWILIO_AVAILABLE = all([
     VERIFIED_NUMBER
 ])
 
-client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN) if TWILIO_AVAILABLE else None
+def build_play_twiml(url):
+    response = VoiceResponse()
+    response.play(url)
+    return str(response)
+
+# Call TwiML only depends on config, so build (and XML-escape) it once
+ALERT_CALL_TWIML = build_play_twiml(VOICE_MP3_URL) if VOICE_MP3_URL else None
+
+@cache
+def get_twilio_client():
+    # Built on the first alert; keep-alive session reuses the TLS connection
+    http_client = TwilioHttpClient(pool_connections=True)
+    http_client.session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=10))
+    return Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, http_client=http_client)
 
 # ======================= TEXT TO SPEECH (LOCAL ONLY) =======================
-engine = None
+# pyttsx3 lives on a single worker thread; replies are cached by content hash
+tts_queue = None
+
+def _tts_worker():
+    global tts_queue
+    jobs = tts_queue
+    try:
+        engine = pyttsx3.init()
+    except Exception as e:
+        logging.error("TTS DISABLED: %s", e)
+        # Stop accepting jobs and release anyone already waiting on one
+        tts_queue = None
+        while True:
+            try:
+                jobs.get_nowait()[2].set()
+            except queue.Empty:
+                return
+
+    while True:
+        reply, path, done = jobs.get()
+        try:
+            if not os.path.exists(path):
+                # SAPI creates the file before synthesis finishes, so write to a
+                # temp name and only move it onto the cache path once complete
+                partial = path[:-len(".wav")] + ".part.wav"
+                engine.save_to_file(reply, partial)
+                engine.runAndWait()
+                os.replace(partial, path)
+        except Exception as e:
+            logging.error("TTS FAILED: %s", e)
+        finally:
+            done.set()
+
 if not IS_RENDER:
     import pyttsx3
-    engine = pyttsx3.init()
+    tts_queue = queue.Queue()
+    threading.Thread(target=_tts_worker, daemon=True).start()
 
-# ======================= EMERGENCY KEYWORDS =======================
-EMERGENCY_WORDS = [
-    "help", "emergency", "save me", "danger", "rescue",
-    "accident", "hospital", "ambulance",
-    "உதவி", "உதவி வேணும்", "அவசரம்", "காப்பாத்து",
-    "udavi", "udhavi", "kapathu", "kaapathu"
-]
+_TTS_PATH_RE = re.compile(r"static/tts_[0-9a-f]{16}\.wav")
+
+def synthesize(reply, wait=False):
+    # Returns the cache path for the reply, or None when TTS is unavailable
+    jobs = tts_queue
+    if jobs is None:
+        return None
+    path = f"static/tts_{hashlib.blake2b(reply.encode(), digest_size=8).hexdigest()}.wav"
+    if not os.path.exists(path):
+        done = threading.Event()
+        jobs.put((reply, path, done))
+        if wait:
+            done.wait(TTS_TIMEOUT)
+    return path
 
+# ======================= EMERGENCY KEYWORDS =======================
 _last_alert = 0
+_alert_lock = threading.Lock()
 
-def is_emergency(text):
-    return any(word in text.lower() for word in EMERGENCY_WORDS)
+EMERGENCY_SENT_JSON = orjson.dumps({"status": "🚨 Emergency alert sent. Help is on the way."})
 
 # ======================= SEND EMERGENCY ALERT =======================
 def send_emergency_alert(msg, location=None):
+    # Serialized so concurrent alerts can't both pass the cooldown check
+    with _alert_lock:
+        _send_emergency_alert(msg, location)
+
+def _send_emergency_alert(msg, location):
     global _last_alert
 
     if not TWILIO_AVAILABLE:
@@ -82,106 +160,216 @@ def send_emergency_alert(msg, location=None):
     if location:
         body += f"\n📍 Location: {location}"
 
-    client.messages.create(
-        body=body,
-        from_=TWILIO_NUMBER,
-        to=VERIFIED_NUMBER
-    )
+    client = get_twilio_client()
 
-    if VOICE_MP3_URL:
-        client.calls.create(
+    # SMS and call are independent round trips, so run them side by side
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        jobs = [pool.submit(
+            client.messages.create,
+            body=body,
             from_=TWILIO_NUMBER,
-            to=VERIFIED_NUMBER,
-            twiml=f"<Response><Play>{VOICE_MP3_URL}</Play></Response>"
-        )
+            to=VERIFIED_NUMBER
+        )]
+
+        if VOICE_MP3_URL:
+            jobs.append(pool.submit(
+                client.calls.create,
+                from_=TWILIO_NUMBER,
+                to=VERIFIED_NUMBER,
+                twiml=ALERT_CALL_TWIML
+            ))
+
+    for job in jobs:
+        job.result()
 
     _last_alert = time.time()
 
+# Alerts go out in the background so the response doesn't wait on Twilio
+_alert_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="alert")
+
+def _log_alert_failure(future):
+    error = future.exception()
+    if error:
+        logging.error("EMERGENCY ALERT FAILED: %s", error)
+
+def dispatch_emergency_alert(msg, location=None):
+    _alert_pool.submit(send_emergency_alert, msg, location).add_done_callback(_log_alert_failure)
+
 # ======================= RULE BASED CHAT =======================
+# (name, pattern, reply) in priority order; callables are only evaluated on a match
+_REPLY_RULES = [
+    ("good_morning", r"good morning", "Good morning. I hope you are feeling well."),
+    ("good_evening", r"good evening", "Good evening. I am here with you."),
+    ("time", r"time", lambda: f"The time is {datetime.now().strftime('%I:%M %p')}."),
+    ("day", r"day", lambda: f"Today is {datetime.now().strftime('%A')}."),
+    ("date", r"date", lambda: f"Today's date is {datetime.now().strftime('%d %B %Y')}."),
+    ("medicine", r"(?:medicine|tablet|pill)s?", "Please remember to take your medicine on time."),
+]
+
+# All rules fused into one alternation; each match reports its rule via lastgroup
+_REPLY_RE = re.compile("|".join(rf"(?P<{name}>\b{pattern}\b)" for name, pattern, _ in _REPLY_RULES))
+_REPLY_HANDLERS = {name: reply for name, _, reply in _REPLY_RULES}
+_RULE_PRIORITY = {name: index for index, (name, _, _) in enumerate(_REPLY_RULES)}
+
+_LISTENING_REPLIES = (
+    "I am listening.",
+    "Please tell me how I can help you.",
+    "I am here with you."
+)
+
+_PUNCT_TABLE = str.maketrans("", "", string.punctuation)
+
+@lru_cache(maxsize=512)
+def _match_rule(text):
+    # Matching is deterministic on the normalized text; the time/random parts
+    # of the reply are resolved by the caller
+    # One scan collects every rule hit; the highest-priority rule wins
+    names = {match.lastgroup for match in _REPLY_RE.finditer(text)}
+    return min(names, key=_RULE_PRIORITY.get, default=None)
+
 def generate_reply(text):
-    text = re.sub(r"[^\w\s]", "", text.lower())
-    now = datetime.now()
-
-    if "good morning" in text:
-        return "Good morning. I hope you are feeling well."
-    if "good evening" in text:
-        return "Good evening. I am here with you."
-    if "time" in text:
-        return f"The time is {now.strftime('%I:%M %p')}."
-    if "day" in text:
-        return f"Today is {now.strftime('%A')}."
-    if "date" in text:
-        return f"Today's date is {now.strftime('%d %B %Y')}."
-    if "medicine" in text or "tablet" in text or "pill" in text:
-        return "Please remember to take your medicine on time."
-
-    return random.choice([
-        "I am listening.",
-        "Please tell me how I can help you.",
-        "I am here with you."
-    ])
+    # Expects lowercased text; voice_input lowercases once for all checks
+    text = text.translate(_PUNCT_TABLE).strip()
+
+    rule = _match_rule(text)
+    if rule is None:
+        return random.choice(_LISTENING_REPLIES)
+
+    reply = _REPLY_HANDLERS[rule]
+    return reply() if callable(reply) else reply
+
+def warm_tts_cache():
+    # The fixed replies are a small closed set; render them once up front so
+    # only the time/date replies ever need live synthesis
+    static_replies = [reply for reply in _REPLY_HANDLERS.values() if not callable(reply)]
+    for reply in static_replies + list(_LISTENING_REPLIES):
+        synthesize(reply)
+
+if tts_queue:
+    warm_tts_cache()
 
 # ======================= YOUTUBE FETCH =======================
+YOUTUBE_CACHE_TTL = 24 * 60 * 60
+YOUTUBE_CACHE_SIZE = 512
+
+# One YoutubeDL per thread (instances are not thread-safe) so lookups on
+# different waitress threads run in parallel while each thread still reuses
+# its extractor setup. extract_flat skips format resolution; only the video
+# id is needed.
+_YDL_OPTS = {
+    "quiet": True,
+    "default_search": "ytsearch1",
+    "noplaylist": True,
+    "extract_flat": "in_playlist",
+    "skip_download": True,
+    "cachedir": os.path.join(tempfile.gettempdir(), "yt-dlp-cache")
+}
+_ydl_local = threading.local()
+
+def _get_ydl():
+    ydl = getattr(_ydl_local, "ydl", None)
+    if ydl is None:
+        ydl = _ydl_local.ydl = YoutubeDL(_YDL_OPTS)
+    return ydl
+
+# LRU with a TTL: hits move to the end, eviction takes the least recently used
+_youtube_cache = OrderedDict()  # normalized query -> (fetched_at, video_id)
+_youtube_cache_lock = threading.Lock()
+
+def _search_youtube(query):
+    with _youtube_cache_lock:
+        hit = _youtube_cache.get(query)
+        if hit:
+            if time.time() - hit[0] < YOUTUBE_CACHE_TTL:
+                _youtube_cache.move_to_end(query)
+                return hit[1]
+            del _youtube_cache[query]
+
+    info = _get_ydl().extract_info(query, download=False)
+    video_id = info["entries"][0]["id"]
+
+    with _youtube_cache_lock:
+        _youtube_cache.pop(query, None)
+        if len(_youtube_cache) >= YOUTUBE_CACHE_SIZE:
+            _youtube_cache.popitem(last=False)
+        _youtube_cache[query] = (time.time(), video_id)
+    return video_id
+
 def get_youtube_url(query):
     try:
-        ydl_opts = {
-            "quiet": True,
-            "default_search": "ytsearch1",
-            "noplaylist": True
-        }
-        with YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(query, download=False)
-            video_id = info["entries"][0]["id"]
-            return f"https://www.youtube.com/watch?v={video_id}"
+        video_id = _search_youtube(query.strip().lower())
+        return f"https://www.youtube.com/watch?v={video_id}"
     except:
         return None
 
 # ======================= ROUTES =======================
+# Templates have no Jinja variables, so render them once at startup
+with app.test_request_context():
+    _STATIC_PAGES = {name: render_template(f"{name}.html").encode() for name in ("index",)}
+
 @app.route("/")
 def index():
-    return render_template("index.html")
+    return app.response_class(_STATIC_PAGES["index"], mimetype="text/html")
 
 @app.route("/voice_input", methods=["POST"])
 def voice_input():
     try:
-        data = request.json or {}
+        data = orjson.loads(request.get_data() or b"{}") or {}
         text = (data.get("text") or "").strip()
+        text_lc = text.lower()
         location = data.get("location")
 
         # 🔥 PLAY COMMAND — MUST BE FIRST
-        if text.lower().startswith("play "):
+        if text_lc.startswith("play "):
             query = text[5:]
             youtube_url = get_youtube_url(query)
             if youtube_url:
-                return jsonify({
+                return ojson({
                     "status": f"🎵 Playing {query}",
                     "youtube_url": youtube_url
                 })
 
         # 🚨 EMERGENCY
         if is_emergency(text):
-            send_emergency_alert(text, location)
-            return jsonify({
-                "status": "🚨 Emergency alert sent. Help is on the way."
-            })
+            dispatch_emergency_alert(text, location)
+            return app.response_class(EMERGENCY_SENT_JSON, mimetype="application/json")
 
         # 💬 RULE BASED RESPONSE
-        reply = generate_reply(text)
-
-        if engine:
-            engine.save_to_file(reply, OUTPUT_AUDIO)
-            engine.runAndWait()
-
-        return jsonify({
+        reply = generate_reply(text_lc)
+
+        # Clients that ask for audio get the WAV in this response, no second fetch
+        wants_audio = request.accept_mimetypes.best_match(
+            ["application/json", "audio/wav"]
+        ) == "audio/wav"
+        if wants_audio:
+            path = synthesize(reply, wait=True)
+            if path and os.path.exists(path):
+                response = send_file(path, mimetype="audio/wav")
+                response.headers["X-Assistant-Reply"] = quote(reply)
+                return response
+
+        reply_audio = synthesize(reply)
+
+        return ojson({
             "status": reply,
-            "reply_audio": None if IS_RENDER else OUTPUT_AUDIO
+            "reply_audio": reply_audio,
+            "ready": bool(reply_audio) and os.path.exists(reply_audio)
         })
 
     except Exception as e:
         print("BACKEND ERROR:", e)
-        return jsonify({"status": "Backend error"}), 500
+        return ojson({"status": "Backend error"}, 500)
+
+@app.route("/tts_ready")
+def tts_ready():
+    path = request.args.get("path", "")
+    if not _TTS_PATH_RE.fullmatch(path):
+        return ojson({"ready": False}, 400)
+    return ojson({"ready": os.path.exists(path)})
 
 # ======================= MAIN =======================
 if __name__ == "__main__":
+    from waitress import serve
+
     port = int(os.environ.get("PORT", 10000))
-    app.run(host="0.0.0.0", port=port)
+    serve(app, host="0.0.0.0", port=port, threads=8)
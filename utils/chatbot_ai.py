@@ -7,6 +7,7 @@ AI reply engine for Elderly Voice Assistant
 """
 
 from collections import deque
+from functools import cache
 import re
 import pyttsx3
 
@@ -19,23 +20,38 @@ from transformers import (
 # ----------------------- Model Load -----------------------
 MODEL_NAME = "facebook/blenderbot-400M-distill"
 
-print("[INFO] Loading conversational model:", MODEL_NAME)
-tokenizer = BlenderbotTokenizer.from_pretrained(MODEL_NAME)
-model = BlenderbotForConditionalGeneration.from_pretrained(MODEL_NAME)
-
 # Use CUDA if available for faster generation
 DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
-model = model.to(DEVICE)
+
+@cache
+def get_model():
+    """
+    Load the tokenizer and model on first use instead of at import.
+    """
+    print("[INFO] Loading conversational model:", MODEL_NAME)
+    tokenizer = BlenderbotTokenizer.from_pretrained(MODEL_NAME)
+    model = BlenderbotForConditionalGeneration.from_pretrained(MODEL_NAME).to(DEVICE).eval()
+    # FP16 on GPU, int8 dynamic quantization of the Linear layers on CPU
+    if DEVICE == "cuda":
+        model = model.half()
+    else:
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return tokenizer, model
 
 # ------------------- Conversation Memory -------------------
 # Keep the last few user/assistant turns to give context
 MAX_TURNS = 6  # total pairs kept (user -> assistant)
-history = deque(maxlen=MAX_TURNS * 2)  # store alternating strings
+# Alternating user/assistant lines, stored already tokenized so each turn is
+# only encoded once
+history = deque(maxlen=MAX_TURNS * 2)
 
 # --------------------- Text-to-Speech ----------------------
-engine = pyttsx3.init()
-engine.setProperty("rate", 165)
-engine.setProperty("volume", 0.95)
+@cache
+def get_tts_engine():
+    engine = pyttsx3.init()
+    engine.setProperty("rate", 165)
+    engine.setProperty("volume", 0.95)
+    return engine
 
 # --------------------- Safety Helpers ----------------------
 _BLOCKLIST = [
@@ -51,13 +67,18 @@ def safe_reply_fallback() -> str:
             "If this is an emergency, please contact local authorities or a trusted caregiver.")
 
 # --------------------- Core Functions ----------------------
-def _build_context(user_input: str) -> str:
+def _encode_line(tokenizer, line: str) -> list:
+    return tokenizer(line, add_special_tokens=False).input_ids
+
+def _build_context(tokenizer, user_ids: list) -> list:
     """
-    Turn short memory into a single context string for BlenderBot.
-    Format: 'user: ...\nassistant: ...\nuser: ...\nassistant: ...\nuser: <new>'
+    Concatenate the cached turn ids and the new user line into encoder input.
+    Format: 'user: ...\nassistant: ...\nuser: <new></s>'. When the context
+    exceeds the model window the oldest tokens are dropped, not the new line.
     """
-    lines = list(history) + [f"user: {user_input.strip()}"]
-    return "\n".join(lines)
+    ids = [tok for turn in history for tok in turn] + user_ids
+    ids = ids[-(tokenizer.model_max_length - 1):]
+    return ids + [tokenizer.eos_token_id]
 
 @torch.inference_mode()
 def generate_ai_reply(user_input: str) -> str:
@@ -70,14 +91,16 @@ def generate_ai_reply(user_input: str) -> str:
     if looks_unsafe(user_input):
         return safe_reply_fallback()
 
-    # Build context and tokenize
-    context = _build_context(user_input)
-    inputs = tokenizer([context], return_tensors="pt", padding=True, truncation=True)
-    inputs = {k: v.to(DEVICE) for k, v in inputs.items()}
+    tokenizer, model = get_model()
+
+    # Only the new line is tokenized; earlier turns come from history
+    user_ids = _encode_line(tokenizer, f"user: {user_input.strip()}")
+    input_ids = torch.tensor([_build_context(tokenizer, user_ids)], device=DEVICE)
 
     # Generate a response (tuned for helpful but concise replies)
     gen_ids = model.generate(
-        **inputs,
+        input_ids=input_ids,
+        attention_mask=torch.ones_like(input_ids),
         max_new_tokens=120,
         do_sample=True,
         top_p=0.92,
@@ -89,9 +112,10 @@ def generate_ai_reply(user_input: str) -> str:
 
     reply = tokenizer.decode(gen_ids[0], skip_special_tokens=True).strip()
 
-    # Update memory
-    history.append(f"user: {user_input.strip()}")
-    history.append(f"assistant: {reply}")
+    # Update memory (each stored line ends with its "\n" separator)
+    newline_ids = _encode_line(tokenizer, "\n")
+    history.append(user_ids + newline_ids)
+    history.append(_encode_line(tokenizer, f"assistant: {reply}") + newline_ids)
 
     # Last polish: avoid empty or echo-y replies
     if not reply:
@@ -104,6 +128,7 @@ def speak_reply(reply: str):
     """
     say = reply if reply else "I'm here, but I didn't catch that."
     print("[AI REPLY]:", say)
+    engine = get_tts_engine()
     engine.say(say)
     engine.runAndWait()
 
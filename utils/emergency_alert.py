@@ -9,19 +9,60 @@ Supports live Google Maps location links.
 
 import os
 import logging
+import re
 import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import Dict, Any, Optional
 from twilio.rest import Client
 from twilio.base.exceptions import TwilioRestException
+from twilio.twiml.voice_response import VoiceResponse
 
-# --- Setup Logging ---
-logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 logger = logging.getLogger(__name__)
 
+# --- Emergency Keywords ---
+EMERGENCY_WORDS = [
+    "help", "emergency", "save me", "danger", "rescue",
+    "accident", "hospital", "ambulance",
+    "உதவி", "உதவி வேணும்", "அவசரம்", "காப்பாத்து",
+    "udavi", "udhavi", "kapathu", "kaapathu"
+]
 
+# Longest keywords first so the alternation prefers "உதவி வேணும்" over "உதவி"
+EMERGENCY_RE = re.compile(
+    "|".join(map(re.escape, sorted(EMERGENCY_WORDS, key=len, reverse=True))),
+    re.IGNORECASE
+)
+
+
+def is_emergency(text: str) -> bool:
+    """
+    Return True if the text contains any emergency keyword (case-insensitive).
+    """
+    return bool(text) and EMERGENCY_RE.search(text) is not None
+
+
+DEFAULT_ALERT_MESSAGE = "🚨 Emergency! The user needs help."
+
+
+def build_say_twiml(message_text: str) -> str:
+    """
+    Build call TwiML that reads the message aloud (XML-escaped by the Twilio helper).
+    """
+    response = VoiceResponse()
+    response.say(message_text)
+    return str(response)
+
+
+# The default alert is sent most often, so its TwiML is built once
+_DEFAULT_TWIML = build_say_twiml(DEFAULT_ALERT_MESSAGE)
+
+
+@lru_cache(maxsize=1)
 def get_twilio_client() -> Optional[Client]:
     """
     Initialize and return a Twilio Client if environment is configured.
+    The client is built on the first alert and reused afterwards.
     Raises EnvironmentError if configuration is missing.
     """
     account_sid = os.getenv("TWILIO_ACCOUNT_SID")
@@ -34,8 +75,50 @@ def get_twilio_client() -> Optional[Client]:
     return Client(account_sid, auth_token)
 
 
+def _send_sms(client: Client, body: str, from_: str, to: str, retries: int) -> str:
+    """
+    Send the SMS, retrying transient failures. Returns a status string.
+    """
+    for attempt in range(1, retries + 2):
+        try:
+            logger.info("🔔 Sending Emergency SMS (Attempt %s)...", attempt)
+            message = client.messages.create(body=body, from_=from_, to=to)
+            logger.info("✅ SMS sent successfully.")
+            return f"✅ SMS sent (SID: {message.sid})"
+        except TwilioRestException as e:
+            logger.error("❌ SMS failed: %s", str(e))
+            if attempt <= retries:
+                time.sleep(2)
+            else:
+                return f"❌ SMS failed: {str(e)}"
+
+
+def _place_call(client: Client, message_text: str, from_: str, to: str, retries: int) -> str:
+    """
+    Place the voice call, retrying transient failures. Returns a status string.
+    """
+    # For voice, only read the text; URL not read aloud
+    twiml = _DEFAULT_TWIML if message_text == DEFAULT_ALERT_MESSAGE else build_say_twiml(message_text)
+    for attempt in range(1, retries + 2):
+        try:
+            logger.info("📞 Placing Emergency Call (Attempt %s)...", attempt)
+            call = client.calls.create(
+                twiml=twiml,
+                from_=from_,
+                to=to
+            )
+            logger.info("✅ Call placed successfully.")
+            return f"✅ Call placed (SID: {call.sid})"
+        except TwilioRestException as e:
+            logger.error("❌ Call failed: %s", str(e))
+            if attempt <= retries:
+                time.sleep(2)
+            else:
+                return f"❌ Call failed: {str(e)}"
+
+
 def send_emergency_alert(
-    message_text: str = "🚨 Emergency! The user needs help.",
+    message_text: str = DEFAULT_ALERT_MESSAGE,
     location_url: Optional[str] = None,
     send_sms: bool = True,
     make_call: bool = True,
@@ -72,52 +155,26 @@ def send_emergency_alert(
     if location_url:
         sms_message += f"\n📍 Location: {location_url}"
 
-    # --- Send SMS ---
-    if send_sms:
-        for attempt in range(1, retries + 2):
-            try:
-                logger.info("🔔 Sending Emergency SMS (Attempt %s)...", attempt)
-                message = client.messages.create(
-                    body=sms_message,
-                    from_=twilio_number,
-                    to=emergency_contact
-                )
-                results["sms"] = f"✅ SMS sent (SID: {message.sid})"
-                logger.info("✅ SMS sent successfully.")
-                break
-            except TwilioRestException as e:
-                logger.error("❌ SMS failed: %s", str(e))
-                if attempt <= retries:
-                    time.sleep(2)
-                else:
-                    results["sms"] = f"❌ SMS failed: {str(e)}"
-
-    # --- Place Call ---
-    if make_call:
-        for attempt in range(1, retries + 2):
-            try:
-                logger.info("📞 Placing Emergency Call (Attempt %s)...", attempt)
-                # For voice, only read the text; URL not read aloud
-                call = client.calls.create(
-                    twiml=f'<Response><Say>{message_text}</Say></Response>',
-                    from_=twilio_number,
-                    to=emergency_contact
-                )
-                results["call"] = f"✅ Call placed (SID: {call.sid})"
-                logger.info("✅ Call placed successfully.")
-                break
-            except TwilioRestException as e:
-                logger.error("❌ Call failed: %s", str(e))
-                if attempt <= retries:
-                    time.sleep(2)
-                else:
-                    results["call"] = f"❌ Call failed: {str(e)}"
+    # SMS and call are independent round trips; run their retry loops in parallel
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        sms_job = pool.submit(
+            _send_sms, client, sms_message, twilio_number, emergency_contact, retries
+        ) if send_sms else None
+        call_job = pool.submit(
+            _place_call, client, message_text, twilio_number, emergency_contact, retries
+        ) if make_call else None
+
+    if sms_job:
+        results["sms"] = sms_job.result()
+    if call_job:
+        results["call"] = call_job.result()
 
     return results
 
 
 # --- Optional Standalone Run ---
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
     sample_text = "🚨 Emergency detected! User requires assistance."
     sample_location = "https://www.google.com/maps?q=12.9716,77.5946"
     output = send_emergency_alert(message_text=sample_text, location_url=sample_location)
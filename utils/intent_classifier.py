@@ -1,15 +1,19 @@
 # utils/intent_classifier.py
 
+import re
+
 from utils import emergency_alert  # Import the emergency alert module
 
+_GREETING_WORDS = frozenset(("hello", "hi", "hey"))
+
 # Classify the intent based on input text
 def classify(text):
     text = text.lower()
-    if any(keyword in text for keyword in ["help", "emergency", "save me", "danger", "i need help"]):
+    if emergency_alert.is_emergency(text):
         return "emergency"
     elif "reminder" in text:
         return "reminder"
-    elif "hello" in text or "hi" in text or "hey" in text:
+    elif _GREETING_WORDS.intersection(re.findall(r"\w+", text)):
         return "greeting"
     else:
         return "unknown"
@@ -1,11 +1,73 @@
-import json
+import atexit
 import datetime
+import json
+import logging
+import queue
+import threading
+
+# Entries are queued and written in batches by a background thread, so
+# save_to_log never touches the filesystem on the caller's thread
+BATCH_SIZE = 64
+FLUSH_INTERVAL = 0.2
+
+_log_queue = queue.Queue()
+_log_files = {}
+_write_lock = threading.Lock()
+
+def _write_batch(batch):
+    lines_by_file = {}
+    for log_file, line in batch:
+        lines_by_file.setdefault(log_file, []).append(line)
+
+    with _write_lock:
+        for log_file, lines in lines_by_file.items():
+            try:
+                f = _log_files.get(log_file)
+                if f is None:
+                    f = _log_files[log_file] = open(log_file, 'ab', buffering=1 << 16)
+                f.write(b"".join(lines))
+                f.flush()
+            except OSError as e:
+                # Keep the writer alive; reopen this file on the next batch
+                logging.error("Chat log write to %s failed: %s", log_file, e)
+                f = _log_files.pop(log_file, None)
+                if f is not None:
+                    try:
+                        f.close()
+                    except OSError:
+                        pass
+
+_STOP = object()  # queued at exit; the writer flushes what it holds and returns
+
+def _writer():
+    while True:
+        item = _log_queue.get()
+        if item is _STOP:
+            return
+        batch = [item]
+        try:
+            while len(batch) < BATCH_SIZE:
+                item = _log_queue.get(timeout=FLUSH_INTERVAL)
+                if item is _STOP:
+                    _write_batch(batch)
+                    return
+                batch.append(item)
+        except queue.Empty:
+            pass
+        _write_batch(batch)
+
+def _shutdown():
+    _log_queue.put(_STOP)
+    _writer_thread.join()
+
+_writer_thread = threading.Thread(target=_writer, daemon=True)
+_writer_thread.start()
+atexit.register(_shutdown)
 
 def save_to_log(user_text, system_reply, log_file='data/chat_history.json'):
-    with open(log_file, 'a') as f:
-        entry = {
-            "time": str(datetime.datetime.now()),
-            "user": user_text,
-            "assistant": system_reply
-        }
-        f.write(json.dumps(entry) + "\n")
+    entry = {
+        "time": str(datetime.datetime.now()),
+        "user": user_text,
+        "assistant": system_reply
+    }
+    _log_queue.put((log_file, (json.dumps(entry) + "\n").encode()))
@@ -1,22 +1,24 @@
-import schedule
-import time
-import threading
+from apscheduler.schedulers.background import BackgroundScheduler
 
 reminders = []
 
+# Event-driven: the scheduler thread sleeps until the next reminder is due.
+# Jobs added before start_reminder_loop() are held and run once it starts.
+scheduler = BackgroundScheduler(daemon=True)
+
 def add_reminder(time_str, message):
-    schedule.every().day.at(time_str).do(trigger_reminder, message)
+    # "HH:MM" or "HH:MM:SS", as schedule's .at() accepted
+    hour, minute, *second = map(int, time_str.split(":"))
+    scheduler.add_job(
+        trigger_reminder, "cron",
+        hour=hour, minute=minute, second=second[0] if second else 0,
+        args=[message]
+    )
     reminders.append((time_str, message))
 
 def trigger_reminder(message):
     print(f"[Reminder] {message}")
 
-def run_reminders():
-    while True:
-        schedule.run_pending()
-        time.sleep(1)
-
 def start_reminder_loop():
-    t = threading.Thread(target=run_reminders)
-    t.daemon = True
-    t.start()
+    if not scheduler.running:
+        scheduler.start()
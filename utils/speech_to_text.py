@@ -1,65 +1,99 @@
-import whisper
+from faster_whisper import WhisperModel
 import os
-import wave
-import pyaudio
-from utils.emergency_alert import send_emergency_alert
+import queue
+import numpy as np
+import sounddevice as sd
+import soundfile as sf
+from utils.emergency_alert import is_emergency, send_emergency_alert
 
-# Load the Whisper model once
-model = whisper.load_model("tiny")
+# Load the Whisper model once (CTranslate2 backend, int8 weights on CPU)
+model = WhisperModel("tiny", device="cpu", compute_type="int8")
+
+# Audio is fed to the recognizer in chunks of this length while recording
+STREAM_CHUNK_SECONDS = 0.5
+# Give up if the input stream delivers nothing for this long
+STREAM_TIMEOUT_SECONDS = 2
 
 def record_audio(duration=5, filename="output.wav"):
-    chunk = 1024
-    sample_format = pyaudio.paInt16
-    channels = 1
     fs = 16000
-    p = pyaudio.PyAudio()
 
     print("🎙️ Listening...")
 
-    stream = p.open(format=sample_format,
-                    channels=channels,
-                    rate=fs,
-                    frames_per_buffer=chunk,
-                    input=True)
-
-    frames = []
-
-    for _ in range(0, int(fs / chunk * duration)):
-        data = stream.read(chunk)
-        frames.append(data)
-
-    stream.stop_stream()
-    stream.close()
-    p.terminate()
+    # Recorded straight into one preallocated int16 buffer
+    audio = sd.rec(int(fs * duration), samplerate=fs, channels=1, dtype="int16")
+    sd.wait()
 
-    wf = wave.open(filename, 'wb')
-    wf.setnchannels(channels)
-    wf.setsampwidth(p.get_sample_size(sample_format))
-    wf.setframerate(fs)
-    wf.writeframes(b''.join(frames))
-    wf.close()
+    sf.write(filename, audio, fs, subtype="PCM_16")
 
     return filename
 
-def transcribe(audio_path):
+def transcribe(audio):
+    # `audio` is a file path or a float32 16 kHz mono numpy array
     try:
-        result = model.transcribe(audio_path)
-        text = result['text'].strip()
+        segments, _ = model.transcribe(audio, beam_size=1, vad_filter=True, without_timestamps=True)
+        text = "".join(segment.text for segment in segments).strip()
         if not text:
             return "No speech detected."
         return text
     except Exception as e:
         return f"❌ Transcription failed: {str(e)}"
 
+def stream_and_detect(duration=5, fs=16000):
+    """
+    Record up to `duration` seconds, transcribing as chunks arrive.
+    Stops early as soon as a partial transcript contains an emergency keyword.
+    Returns (transcript, is_emergency).
+    """
+    chunks = queue.Queue()
+
+    def callback(indata, frames, time_info, status):
+        chunks.put(indata[:, 0].copy())
+
+    stream = sd.InputStream(samplerate=fs,
+                            channels=1,
+                            dtype="int16",
+                            blocksize=int(fs * STREAM_CHUNK_SECONDS),
+                            callback=callback)
+    stream.start()
+
+    audio = np.zeros(int(fs * duration), dtype=np.int16)
+    filled = 0
+    result = ""
+
+    try:
+        while filled < len(audio):
+            try:
+                pending = [chunks.get(timeout=STREAM_TIMEOUT_SECONDS)]
+            except queue.Empty:
+                break
+            # Take everything that arrived during the last transcription, so
+            # there is at most one transcription per pass
+            while True:
+                try:
+                    pending.append(chunks.get_nowait())
+                except queue.Empty:
+                    break
+
+            for chunk in pending:
+                n = min(len(chunk), len(audio) - filled)
+                audio[filled:filled + n] = chunk[:n]
+                filled += n
+
+            result = transcribe(audio[:filled].astype(np.float32) / 32768.0)
+            if is_emergency(result):
+                return result, True
+    finally:
+        stream.stop()
+        stream.close()
+
+    return result, False
+
 def listen_and_process():
     print("🎙️ Listening...")
-    audio = record_audio()
-    print("⏳ Transcribing...")
-    result = transcribe(audio)
+    result, emergency = stream_and_detect()
     print("📝 Output:", result)
 
-    emergency_keywords = ["help", "emergency", "call", "message", "save me"]
-    if any(word in result.lower() for word in emergency_keywords):
+    if emergency:
         send_emergency_alert()
         return f"🆘 Emergency detected! Message and call sent. ➡️ {result}"
     else:
@@ -72,7 +106,7 @@ if __name__ == "__main__":
     result = transcribe(audio_file)
     print("📝 Output:", result)
 
-    if any(keyword in result.lower() for keyword in ["help", "emergency", "call now", "send message", "save me"]):
+    if is_emergency(result):
         send_emergency_alert()
     else:
         print("ℹ️ No emergency command detected.")
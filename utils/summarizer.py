@@ -1,7 +1,56 @@
-from transformers import pipeline
-summarizer = pipeline("summarization", model="t5-small")
+import os
+from functools import cache
+
+from optimum.onnxruntime import ORTModelForSeq2SeqLM, ORTQuantizer
+from optimum.onnxruntime.configuration import AutoQuantizationConfig
+from transformers import AutoTokenizer
+
+MODEL_NAME = "t5-small"
+ONNX_DIR = "models/t5-small-onnx"
+INT8_DIR = "models/t5-small-onnx-int8"
+ONNX_FILES = ("encoder_model", "decoder_model", "decoder_with_past_model")
+
+def _export_int8():
+    # One-time ONNX export + dynamic int8 quantization, reused on later runs
+    ORTModelForSeq2SeqLM.from_pretrained(MODEL_NAME, export=True).save_pretrained(ONNX_DIR)
+    qconfig = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+    for name in ONNX_FILES:
+        quantizer = ORTQuantizer.from_pretrained(ONNX_DIR, file_name=f"{name}.onnx")
+        quantizer.quantize(save_dir=INT8_DIR, quantization_config=qconfig)
+
+def _export_complete():
+    # quantize() writes one graph at a time, so a partial export leaves some missing
+    return all(os.path.isfile(os.path.join(INT8_DIR, f"{name}_quantized.onnx")) for name in ONNX_FILES)
+
+@cache
+def get_summarizer():
+    if not _export_complete():
+        _export_int8()
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+    model = ORTModelForSeq2SeqLM.from_pretrained(
+        INT8_DIR,
+        encoder_file_name="encoder_model_quantized.onnx",
+        decoder_file_name="decoder_model_quantized.onnx",
+        decoder_with_past_file_name="decoder_with_past_model_quantized.onnx",
+        provider="CPUExecutionProvider",
+    )
+    return tokenizer, model
 
 def summarize(text):
     if len(text.split()) > 30:
-        return summarizer(text, max_length=40, min_length=15, do_sample=False)[0]['summary_text']
+        tokenizer, model = get_summarizer()
+        ids = tokenizer("summarize: " + text, return_tensors="pt", truncation=True, max_length=512).input_ids
+        # Same decoding as the old pipeline: t5-small's summarization defaults
+        # (beam search etc.) with our length limits on top
+        out = model.generate(
+            ids,
+            max_length=40,
+            min_length=15,
+            do_sample=False,
+            num_beams=4,
+            no_repeat_ngram_size=3,
+            length_penalty=2.0,
+            early_stopping=True,
+        )
+        return tokenizer.decode(out[0], skip_special_tokens=True)
     return text
@@ -1,13 +1,23 @@
+from functools import cache
+
+import torch
 from langdetect import detect
 from transformers import MarianMTModel, MarianTokenizer
 
 def detect_language(text):
     return detect(text)
 
-def translate_to_english(text, src_lang_code):
+@cache
+def get_translator(src_lang_code):
+    # Loaded once per language pair instead of on every call
     model_name = f"Helsinki-NLP/opus-mt-{src_lang_code}-en"
-    model = MarianMTModel.from_pretrained(model_name)
     tokenizer = MarianTokenizer.from_pretrained(model_name)
-    batch = tokenizer.prepare_seq2seq_batch([text], return_tensors="pt")
-    translated = model.generate(**batch)
+    model = MarianMTModel.from_pretrained(model_name).eval()
+    return tokenizer, model
+
+def translate_to_english(text, src_lang_code):
+    tokenizer, model = get_translator(src_lang_code)
+    batch = tokenizer([text], return_tensors="pt", padding=True)
+    with torch.inference_mode():
+        translated = model.generate(**batch)
     return tokenizer.decode(translated[0], skip_special_tokens=True)